@@ -1,17 +1,57 @@
 import base64
+import functools
+import hashlib
 import io
+import json
+import os
 
 import numpy as np
 import pandas as pd
-from dash import Dash, dcc, html, dash_table, Input, Output, State
+from dash import Dash, dcc, html, Input, Output, State, no_update
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+try:
+    from flask_caching import Cache
+except ImportError:  # 没装 flask-caching 时不做缓存
+    Cache = None
+
+try:
+    import flask_compress  # noqa: F401
+    _HAS_COMPRESS = True
+except ImportError:  # 没装 flask-compress 时不压缩响应
+    _HAS_COMPRESS = False
+
+# 读文件的引擎：装了 Rust / Arrow 实现就用快的，否则退回 pandas 默认
+# calamine 引擎要 pandas >= 2.2；engine=None 时 pandas 按文件头自己选（.xls 走 xlrd）
+_XL_ENGINE = None
+if tuple(int(v) for v in pd.__version__.split(".")[:2]) >= (2, 2):
+    try:
+        import python_calamine  # noqa: F401
+        _XL_ENGINE = "calamine"
+    except ImportError:
+        pass
+
+try:
+    from pyarrow import BufferReader
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 # -----------------------------------------------------------
 # 1. 默认示例数据（就是你发给我的 Raw Data）
 # -----------------------------------------------------------
 
-def get_default_data():
+# 派生列：利润率百分比（0.14 -> 14），各图表/表格直接复用，不再各自乘 100
+PM_PCT_COL = "Profit Margin (%) pct"
+
+
+def _normalize(revenue_df):
+    revenue_df[PM_PCT_COL] = revenue_df["Profit Margin (%)"].to_numpy() * 100
+    return revenue_df
+
+
+def _build_default_data():
     years = ["Year -4", "Year -3", "Year -2", "Year -1", "Year 0"]
 
     revenue_df = pd.DataFrame(
@@ -56,67 +96,79 @@ def get_default_data():
         "Liabilities & Shareholders' Equity": 985_295,
     }
 
+    revenue_df = _normalize(revenue_df)
     return revenue_df, expenses_df, budget_year0, balance_sheet
 
 
+# 示例数据只在启动时构建一次，之后都返回同一份（调用方不要原地修改）
+_DEFAULT_DATA = _build_default_data()
+
+
+def get_default_data():
+    return _DEFAULT_DATA
+
+
 # -----------------------------------------------------------
 # 2. 解析上传文件（可选）
 # -----------------------------------------------------------
 
+_REV_COLS = [
+    "Year",
+    "Business 1",
+    "Business 2",
+    "Business 3",
+    "Consolidated",
+    "COGS",
+    "Profit Margin ($)",
+    "Profit Margin (%)",
+]
+
+_EXP_COLS = [
+    "Year",
+    "Salaries and Benefits",
+    "Rent and Overhead",
+    "Depreciation & Amortization",
+    "Interest",
+    "Total Expenses",
+]
+
+_REQUIRED_COLS = frozenset(_REV_COLS + _EXP_COLS)
+
+
 def parse_contents(contents, filename):
     content_type, content_string = contents.split(",")
     decoded = base64.b64decode(content_string)
 
     if filename.lower().endswith(".csv"):
-        df = pd.read_csv(io.StringIO(decoded.decode("utf-8")))
+        if pacsv is not None:
+            # Arrow 直接读字节，不用先 decode 成 str 再包一层 StringIO
+            df = pacsv.read_csv(BufferReader(decoded)).to_pandas()
+        else:
+            df = pd.read_csv(io.BytesIO(decoded))
     else:
-        df = pd.read_excel(io.BytesIO(decoded))
-
-    required_cols = [
-        "Year",
-        "Business 1",
-        "Business 2",
-        "Business 3",
-        "Consolidated",
-        "COGS",
-        "Profit Margin ($)",
-        "Profit Margin (%)",
-        "Salaries and Benefits",
-        "Rent and Overhead",
-        "Depreciation & Amortization",
-        "Interest",
-        "Total Expenses",
-    ]
+        df = pd.read_excel(io.BytesIO(decoded), engine=_XL_ENGINE)
+
     if "Total" in df.columns and "Total Expenses" not in df.columns:
         df = df.rename(columns={"Total": "Total Expenses"})
 
-    missing = [c for c in required_cols if c not in df.columns]
+    missing = _REQUIRED_COLS.difference(df.columns)
     if missing:
-        raise ValueError(f"Missing columns in uploaded file: {missing}")
-
-    rev_cols = [
-        "Year",
-        "Business 1",
-        "Business 2",
-        "Business 3",
-        "Consolidated",
-        "COGS",
-        "Profit Margin ($)",
-        "Profit Margin (%)",
-    ]
-    revenue_df = df[rev_cols].copy()
-
-    exp_cols = [
-        "Year",
-        "Salaries and Benefits",
-        "Rent and Overhead",
-        "Depreciation & Amortization",
-        "Interest",
-        "Total Expenses",
-    ]
-    expenses_df = df[exp_cols].copy()
+        raise ValueError(f"Missing columns in uploaded file: {sorted(missing)}")
+
+    # 数值列在这里就转好；有文字之类的非法值直接报错，走上传失败的提示
+    for col in _REV_COLS[1:] + _EXP_COLS[1:]:
+        try:
+            df[col] = pd.to_numeric(df[col], errors="raise")
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Column '{col}' contains non-numeric values: {e}") from e
+
+    revenue_df = df[_REV_COLS].copy()
+
+    expenses_df = df[_EXP_COLS].copy()
     expenses_df = expenses_df.rename(columns={"Total Expenses": "Total"})
 
+    revenue_df = _normalize(revenue_df)
+
     _, _, budget, bs = get_default_data()
     return revenue_df, expenses_df, budget, bs
 
@@ -125,8 +177,10 @@ def parse_contents(contents, filename):
 # 3. 图表函数（颜色区分好 + 字体放松一点）
 # -----------------------------------------------------------
 
+@functools.lru_cache(maxsize=16)
 def base_layout(title):
     # 不在这里设置 margin，避免重复传参
+    # 结果会被缓存复用，调用方只用 ** 展开，不要原地修改
     return dict(
         title=title,
         template="plotly_white",
@@ -135,24 +189,24 @@ def base_layout(title):
 
 
 def build_business_unit_revenue_figure(revenue_df):
-    years = revenue_df["Year"]
+    years = revenue_df["Year"].to_numpy()
 
     fig = go.Figure()
     fig.add_bar(
         x=years,
-        y=revenue_df["Business 1"],
+        y=revenue_df["Business 1"].to_numpy(),
         name="Business 1",
         marker_color="#4F81BD",
     )
     fig.add_bar(
         x=years,
-        y=revenue_df["Business 2"],
+        y=revenue_df["Business 2"].to_numpy(),
         name="Business 2",
         marker_color="#A5A5A5",
     )
     fig.add_bar(
         x=years,
-        y=revenue_df["Business 3"],
+        y=revenue_df["Business 3"].to_numpy(),
         name="Business 3",
         marker_color="#5B9BD5",
     )
@@ -175,13 +229,13 @@ def build_business_unit_revenue_figure(revenue_df):
 
 
 def build_profit_margin_figure(revenue_df):
-    years = revenue_df["Year"]
+    years = revenue_df["Year"].to_numpy()
 
     fig = go.Figure()
 
     fig.add_bar(
         x=years,
-        y=revenue_df["Profit Margin ($)"],
+        y=revenue_df["Profit Margin ($)"].to_numpy(),
         name="Profit Margin ($)",
         marker_color="#4472C4",
         yaxis="y1",
@@ -190,7 +244,7 @@ def build_profit_margin_figure(revenue_df):
     fig.add_trace(
         go.Scatter(
             x=years,
-            y=revenue_df["Profit Margin (%)"] * 100,
+            y=revenue_df[PM_PCT_COL].to_numpy(),
             name="Profit Margin (%)",
             mode="lines+markers",
             marker=dict(size=7, color="#ED7D31"),
@@ -226,7 +280,7 @@ def build_profit_margin_figure(revenue_df):
 
 
 def build_cumulative_revenue_figure(revenue_df):
-    year0 = revenue_df.iloc[-1]
+    year0 = revenue_df.iloc[-1].to_dict()
     x = ["Business 1", "Business 2", "Business 3", "Consolidated"]
     y = [year0["Business 1"], year0["Business 2"], year0["Business 3"], year0["Consolidated"]]
 
@@ -235,7 +289,7 @@ def build_cumulative_revenue_figure(revenue_df):
             x=x,
             y=y,
             measure=["relative", "relative", "relative", "total"],
-            text=[f"{v:,.0f}" for v in y],
+            text=[format(v, ",.0f") for v in y],
             textposition="outside",
             connector={"line": {"color": "rgb(150,150,150)"}},
         )
@@ -249,13 +303,13 @@ def build_cumulative_revenue_figure(revenue_df):
 
 
 def build_expenses_figure(expenses_df):
-    years = expenses_df["Year"]
+    years = expenses_df["Year"].to_numpy()
 
     fig = go.Figure()
     fig.add_trace(
         go.Scatter(
             x=years,
-            y=expenses_df["Salaries and Benefits"],
+            y=expenses_df["Salaries and Benefits"].to_numpy(),
             stackgroup="one",
             name="Salaries and Benefits",
             mode="none",
@@ -265,7 +319,7 @@ def build_expenses_figure(expenses_df):
     fig.add_trace(
         go.Scatter(
             x=years,
-            y=expenses_df["Rent and Overhead"],
+            y=expenses_df["Rent and Overhead"].to_numpy(),
             stackgroup="one",
             name="Rent and Overhead",
             mode="none",
@@ -275,7 +329,7 @@ def build_expenses_figure(expenses_df):
     fig.add_trace(
         go.Scatter(
             x=years,
-            y=expenses_df["Depreciation & Amortization"],
+            y=expenses_df["Depreciation & Amortization"].to_numpy(),
             stackgroup="one",
             name="Depreciation & Amortization",
             mode="none",
@@ -285,7 +339,7 @@ def build_expenses_figure(expenses_df):
     fig.add_trace(
         go.Scatter(
             x=years,
-            y=expenses_df["Interest"],
+            y=expenses_df["Interest"].to_numpy(),
             stackgroup="one",
             name="Interest",
             mode="none",
@@ -309,14 +363,100 @@ def build_expenses_figure(expenses_df):
     return fig
 
 
+# -------- 小表格：行数很少，直接服务端渲染成 html.Table ----------
+
+TABLE_STYLE = {
+    "width": "100%",
+    "borderCollapse": "collapse",
+    "fontFamily": "Arial",
+    "fontSize": 13,
+}
+
+TABLE_CELL_STYLE = {
+    "padding": "8px",
+    "borderBottom": "1px solid #ddd",
+}
+
+TABLE_HEADER_STYLE = {
+    **TABLE_CELL_STYLE,
+    "fontWeight": "bold",
+    "backgroundColor": "#f2f2f2",
+}
+
+
+def small_table(
+    columns,
+    records,
+    key_col=None,
+    right_cols=(),
+    formats=None,
+    row_formats=None,
+    sign_cols=(),
+    bold_rows=(),
+):
+    # 几行静态数据用不着 DataTable 的 JS、过滤和虚拟滚动
+    # key_col 那一列的值用来匹配 row_formats（整行的数字格式，优先于 formats）和 bold_rows
+    formats = formats or {}
+    row_formats = row_formats or {}
+
+    def fmt(col, value, key):
+        if value == "" or value is None:
+            return ""
+        if isinstance(value, (int, float, np.number)):
+            if np.isnan(value):
+                return ""
+            return format(value, row_formats.get(key) or formats.get(col, ",.2f"))
+        return str(value)
+
+    def cell_style(col, value, bold):
+        style = TABLE_CELL_STYLE.copy()
+        style["textAlign"] = "right" if col in right_cols else "left"
+        if bold:
+            style["fontWeight"] = "bold"
+        if col in sign_cols and isinstance(value, (int, float, np.number)):
+            if value < 0:
+                style["color"] = "red"
+            elif value > 0:
+                style["color"] = "green"
+        return style
+
+    header = html.Thead(
+        html.Tr(
+            [
+                html.Th(
+                    col,
+                    style={**TABLE_HEADER_STYLE, "textAlign": "right" if col in right_cols else "left"},
+                )
+                for col in columns
+            ]
+        )
+    )
+    rows = []
+    for rec in records:
+        key = rec[key_col] if key_col is not None else None
+        rows.append(
+            html.Tr(
+                [
+                    html.Td(
+                        fmt(col, rec[col], key),
+                        style=cell_style(col, rec[col], key in bold_rows),
+                    )
+                    for col in columns
+                ]
+            )
+        )
+    body = html.Tbody(rows)
+    return html.Table([header, body], style=TABLE_STYLE)
+
+
 # -------- Performance Summary：表格 + 右侧微缩柱状+折线图 ----------
 
 def build_performance_summary_section(revenue_df, expenses_df):
-    avg_revenue = revenue_df["Consolidated"].mean()
-    avg_cogs = revenue_df["COGS"].mean()
+    # 四列一次 .mean() 求完，代替四次单列调用
+    avg_revenue, avg_cogs, avg_prof, avg_prof_pct = (
+        revenue_df[["Consolidated", "COGS", "Profit Margin ($)", PM_PCT_COL]].mean().to_numpy()
+    )
     avg_exp = expenses_df["Total"].mean()
-    avg_prof = revenue_df["Profit Margin ($)"].mean()
-    avg_prof_pct = revenue_df["Profit Margin (%)"].mean() * 100
 
     metrics = [
         "Revenue",
@@ -333,39 +473,24 @@ def build_performance_summary_section(revenue_df, expenses_df):
         avg_prof_pct,
     ]
 
-    table_df = pd.DataFrame(
-        {"Metric": metrics, "5-Yr Average": averages}
-    )
+    records = [{"Metric": m, "5-Yr Average": a} for m, a in zip(metrics, averages)]
 
-    perf_table = dash_table.DataTable(
-        columns=[
-            {"name": "Metric", "id": "Metric"},
-            {"name": "5-Yr Average", "id": "5-Yr Average", "type": "numeric"},
-        ],
-        data=table_df.to_dict("records"),
-        style_cell={
-            "textAlign": "left",
-            "padding": "8px",
-            "fontFamily": "Arial",
-            "fontSize": 13,
-        },
-        style_header={
-            "fontWeight": "bold",
-            "backgroundColor": "#f2f2f2",
-        },
-        style_data_conditional=[
-            {"if": {"column_id": "5-Yr Average"}, "textAlign": "right"},
-        ],
-        style_table={"width": "100%"},
+    perf_table = small_table(
+        ["Metric", "5-Yr Average"],
+        records,
+        key_col="Metric",
+        right_cols=("5-Yr Average",),
+        formats={"5-Yr Average": ",.0f"},
+        row_formats={"Profit Margin (%)": ",.1f"},
     )
 
-    years = revenue_df["Year"]
+    years = revenue_df["Year"].to_numpy()
     series_dict = {
         "Revenue": revenue_df["Consolidated"],
         "COGS": revenue_df["COGS"],
         "Expenses": expenses_df["Total"],
         "Profit Margin": revenue_df["Profit Margin ($)"],
-        "Profit Margin (%)": revenue_df["Profit Margin (%)"] * 100,
+        "Profit Margin (%)": revenue_df[PM_PCT_COL],
     }
 
     colors_bar = {
@@ -392,32 +517,32 @@ def build_performance_summary_section(revenue_df, expenses_df):
         subplot_titles=metrics,
     )
 
-    for i, metric in enumerate(metrics, start=1):
-        s = series_dict[metric]
-        fig.add_trace(
-            go.Bar(
-                x=years,
-                y=s,
-                marker_color=colors_bar[metric],
-                showlegend=False,
-            ),
-            row=i,
-            col=1,
+    # 10 条 trace 一次性构建、一次性 add_traces，比逐条 add_trace 少很多校验开销
+    ys = {m: np.asarray(series_dict[m]) for m in metrics}
+    bar_traces = [
+        go.Bar(
+            x=years,
+            y=ys[m],
+            marker_color=colors_bar[m],
+            showlegend=False,
         )
-        fig.add_trace(
-            go.Scatter(
-                x=years,
-                y=s,
-                mode="lines+markers",
-                line=dict(color=colors_line[metric], width=2),
-                marker=dict(size=4),
-                showlegend=False,
-            ),
-            row=i,
-            col=1,
+        for m in metrics
+    ]
+    line_traces = [
+        go.Scatter(
+            x=years,
+            y=ys[m],
+            mode="lines+markers",
+            line=dict(color=colors_line[m], width=2),
+            marker=dict(size=4),
+            showlegend=False,
         )
-        fig.update_yaxes(showticklabels=False, row=i, col=1)
-        fig.update_xaxes(showgrid=False, row=i, col=1)
+        for m in metrics
+    ]
+    rows = list(range(1, len(metrics) + 1))
+    fig.add_traces(bar_traces + line_traces, rows=rows * 2, cols=[1] * (2 * len(metrics)))
+    fig.update_yaxes(showticklabels=False)
+    fig.update_xaxes(showgrid=False)
 
     fig.update_layout(
         **base_layout("Trend (Five-Year – Micro Charts)"),
@@ -444,66 +569,51 @@ def build_performance_summary_section(revenue_df, expenses_df):
 # ----------------- Income Statement ------------------------
 
 def build_income_statement_table(revenue_df, expenses_df, budget_year0):
-    year0_rev = revenue_df.iloc[-1]
-    year0_exp = expenses_df.iloc[-1]
+    # 最后一行（Year 0）一次性转成 dict，后面都是普通字典取值
+    year0_rev = revenue_df.iloc[-1].to_dict()
+    year0_exp = expenses_df.iloc[-1].to_dict()
 
     actual_revenue = year0_rev["Consolidated"]
     actual_cogs = year0_rev["COGS"]
     actual_expenses = year0_exp["Total"]
     actual_profit = year0_rev["Profit Margin ($)"]
-    actual_profit_pct = year0_rev["Profit Margin (%)"]
-
-    lines = [
-        ("Revenue", actual_revenue, budget_year0["Revenue"]),
-        ("COGS", actual_cogs, budget_year0["COGS"]),
-        ("Expenses", actual_expenses, budget_year0["Expenses"]),
-        ("Profit Margin", actual_profit, budget_year0["Profit Margin"]),
-        ("Profit Margin (%)", actual_profit_pct * 100, budget_year0["Profit Margin (%)"] * 100),
-    ]
+    actual_profit_pct = year0_rev[PM_PCT_COL]
 
-    records = []
-    for name, actual, budget in lines:
-        variance = actual - budget
-        var_pct = variance / budget * 100 if budget != 0 else np.nan
-        records.append(
-            {
-                "Item": name,
-                "Actual": actual,
-                "Budget": budget,
-                "Variance": variance,
-                "Var%": var_pct,
-            }
-        )
+    names = ["Revenue", "COGS", "Expenses", "Profit Margin", "Profit Margin (%)"]
+    actual = np.array(
+        [actual_revenue, actual_cogs, actual_expenses, actual_profit, actual_profit_pct],
+        dtype=float,
+    )
+    budget = np.array(
+        [
+            budget_year0["Revenue"],
+            budget_year0["COGS"],
+            budget_year0["Expenses"],
+            budget_year0["Profit Margin"],
+            budget_year0["Profit Margin (%)"] * 100,
+        ],
+        dtype=float,
+    )
 
-    df = pd.DataFrame(records)
+    variance = actual - budget
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_pct = np.where(budget != 0, variance / budget * 100, np.nan)
 
-    table = dash_table.DataTable(
-        columns=[
-            {"name": "Item", "id": "Item"},
-            {"name": "Actual", "id": "Actual", "type": "numeric"},
-            {"name": "Budget", "id": "Budget", "type": "numeric"},
-            {"name": "Variance", "id": "Variance", "type": "numeric"},
-            {"name": "Var%", "id": "Var%", "type": "numeric"},
-        ],
-        data=df.to_dict("records"),
-        style_cell={
-            "textAlign": "right",
-            "padding": "8px",
-            "fontFamily": "Arial",
-            "fontSize": 13,
-        },
-        style_header={
-            "fontWeight": "bold",
-            "backgroundColor": "#f2f2f2",
-        },
-        style_data_conditional=[
-            {"if": {"column_id": "Item"}, "textAlign": "left"},
-            {"if": {"filter_query": "{Variance} < 0", "column_id": "Variance"}, "color": "red"},
-            {"if": {"filter_query": "{Variance} > 0", "column_id": "Variance"}, "color": "green"},
-            {"if": {"filter_query": "{Var%} < 0", "column_id": "Var%"}, "color": "red"},
-            {"if": {"filter_query": "{Var%} > 0", "column_id": "Var%"}, "color": "green"},
-        ],
-        style_table={"width": "100%"},
+    records = [
+        {"Item": n, "Actual": a, "Budget": b, "Variance": v, "Var%": p}
+        for n, a, b, v, p in zip(
+            names, actual.tolist(), budget.tolist(), variance.tolist(), var_pct.tolist()
+        )
+    ]
+
+    table = small_table(
+        ["Item", "Actual", "Budget", "Variance", "Var%"],
+        records,
+        key_col="Item",
+        right_cols=("Actual", "Budget", "Variance", "Var%"),
+        formats={"Actual": ",.0f", "Budget": ",.0f", "Variance": ",.0f", "Var%": ",.1f"},
+        row_formats={"Profit Margin (%)": ",.1f"},
+        sign_cols=("Variance", "Var%"),
     )
     return table
 
@@ -511,8 +621,9 @@ def build_income_statement_table(revenue_df, expenses_df, budget_year0):
 # ----------------- P&L Summary -----------------------------
 
 def build_pl_summary_table(revenue_df, expenses_df):
-    year0_rev = revenue_df.iloc[-1]
-    year0_exp = expenses_df.iloc[-1]
+    # 最后一行（Year 0）一次性转成 dict，后面都是普通字典取值
+    year0_rev = revenue_df.iloc[-1].to_dict()
+    year0_exp = expenses_df.iloc[-1].to_dict()
 
     records = [
         {"Item": "Revenue", "Amount": year0_rev["Consolidated"]},
@@ -526,29 +637,14 @@ def build_pl_summary_table(revenue_df, expenses_df):
         {"Item": "", "Amount": ""},
         {"Item": "Net Operating Profit", "Amount": year0_rev["Profit Margin ($)"]},
     ]
-    df = pd.DataFrame(records)
 
-    table = dash_table.DataTable(
-        columns=[
-            {"name": "Item", "id": "Item"},
-            {"name": "Amount", "id": "Amount"},
-        ],
-        data=df.to_dict("records"),
-        style_cell={
-            "textAlign": "right",
-            "padding": "8px",
-            "fontFamily": "Arial",
-            "fontSize": 13,
-        },
-        style_header={
-            "fontWeight": "bold",
-            "backgroundColor": "#f2f2f2",
-        },
-        style_data_conditional=[
-            {"if": {"column_id": "Item"}, "textAlign": "left"},
-            {"if": {"filter_query": "{Item} = 'Net Operating Profit'"}, "fontWeight": "bold"},
-        ],
-        style_table={"width": "100%"},
+    table = small_table(
+        ["Item", "Amount"],
+        records,
+        key_col="Item",
+        right_cols=("Amount",),
+        formats={"Amount": ",.0f"},
+        bold_rows=("Net Operating Profit",),
     )
     return table
 
@@ -645,6 +741,12 @@ default_is_table = build_income_statement_table(_default_rev, _default_exp, _def
 default_pl_table = build_pl_summary_table(_default_rev, _default_exp)
 default_bs_section = build_balance_sheet_section(_default_bs)
 
+# 默认图只序列化一次，回调里直接返回 dict，省掉每次的 Figure -> JSON 转换
+default_rev_fig_json = default_rev_fig.to_plotly_json()
+default_pm_fig_json = default_pm_fig.to_plotly_json()
+default_cum_fig_json = default_cum_fig.to_plotly_json()
+default_exp_fig_json = default_exp_fig.to_plotly_json()
+
 
 # -----------------------------------------------------------
 # 5. Dash Layout
@@ -652,9 +754,30 @@ default_bs_section = build_balance_sheet_section(_default_bs)
 
 external_stylesheets = ["https://codepen.io/chriddyp/pen/bWLwgP.css"]
 
-app = Dash(__name__, external_stylesheets=external_stylesheets)
+# 回调返回的图表 JSON 很好压缩，装了 flask-compress 就交给 Dash 自己开启
+app = Dash(__name__, external_stylesheets=external_stylesheets, compress=_HAS_COMPRESS)
 app.title = "Financial Dashboard"
 
+# 服务端缓存：同一个文件重复上传时直接复用解析和作图结果
+if Cache is not None:
+    cache = Cache(
+        app.server,
+        config={
+            "CACHE_TYPE": "FileSystemCache",
+            # 放在本应用的 instance 目录下，不用共享的 /tmp（缓存文件会被 unpickle）
+            "CACHE_DIR": os.getenv(
+                "DASH_CACHE_DIR", os.path.join(app.server.instance_path, "dash-cache")
+            ),
+            "CACHE_DEFAULT_TIMEOUT": 3600,
+        },
+    )
+    memoize = cache.memoize
+else:
+    cache = None
+
+    def memoize(*args, **kwargs):
+        return lambda func: func
+
 app.layout = html.Div(
     [
         html.H2("Financial Dashboard", style={"textAlign": "center", "marginBottom": "10px"}),
@@ -675,19 +798,20 @@ app.layout = html.Div(
             multiple=False,
         ),
         html.Div(id="upload-status", style={"marginBottom": "20px", "fontStyle": "italic"}),
+        dcc.Store(id="parsed-store"),
 
         html.Div(
             className="row",
             children=[
-                html.Div(dcc.Graph(id="rev_graph", figure=default_rev_fig), className="six columns"),
-                html.Div(dcc.Graph(id="pm_graph", figure=default_pm_fig), className="six columns"),
+                html.Div(dcc.Graph(id="rev_graph", figure=default_rev_fig_json), className="six columns"),
+                html.Div(dcc.Graph(id="pm_graph", figure=default_pm_fig_json), className="six columns"),
             ],
         ),
         html.Div(
             className="row",
             children=[
-                html.Div(dcc.Graph(id="cumrev_graph", figure=default_cum_fig), className="six columns"),
-                html.Div(dcc.Graph(id="exp_graph", figure=default_exp_fig), className="six columns"),
+                html.Div(dcc.Graph(id="cumrev_graph", figure=default_cum_fig_json), className="six columns"),
+                html.Div(dcc.Graph(id="exp_graph", figure=default_exp_fig_json), className="six columns"),
             ],
         ),
         html.Div(
@@ -735,8 +859,47 @@ app.layout = html.Div(
 
 # -----------------------------------------------------------
 # 6. Callback：上传文件时才更新（不上传就用默认图）
+#    先解析一次存进 dcc.Store，再由渲染回调从 Store 生成图表
 # -----------------------------------------------------------
 
+@app.callback(
+    [
+        Output("parsed-store", "data"),
+        Output("upload-status", "children"),
+    ],
+    [Input("upload-data", "contents")],
+    [State("upload-data", "filename")],
+)
+def parse_upload(contents, filename):
+    if contents is None:
+        return None, "Using built-in sample data (no file uploaded)."
+
+    contents_hash = hashlib.blake2b(contents.encode("utf-8"), digest_size=16).hexdigest()
+    return _parse_to_store(contents_hash, filename, contents)
+
+
+@memoize(args_to_ignore=["contents"])
+def _parse_to_store(contents_hash, filename, contents):
+    # 缓存键只用 (contents_hash, filename)，避免把整个 base64 字符串拿去算 key
+    try:
+        revenue_df, expenses_df, budget, bs = parse_contents(contents, filename)
+    except Exception as e:
+        # 解析失败：Store 和图表都保持不变，只更新状态文字
+        status = (
+            f"Failed to parse uploaded file '{filename}': {e}. "
+            "Keeping the charts currently shown."
+        )
+        return no_update, status
+
+    data = {
+        "revenue": revenue_df.to_dict("split"),
+        "expenses": expenses_df.to_dict("split"),
+        "budget": budget,
+        "bs": bs,
+    }
+    return data, f"File '{filename}' uploaded and parsed successfully."
+
+
 @app.callback(
     [
         Output("rev_graph", "figure"),
@@ -747,25 +910,36 @@ app.layout = html.Div(
         Output("is_table", "children"),
         Output("pl_table", "children"),
         Output("bs_table", "children"),
-        Output("upload-status", "children"),
     ],
-    [Input("upload-data", "contents")],
-    [State("upload-data", "filename")],
+    [Input("parsed-store", "data")],
 )
-def update_dashboard(contents, filename):
-    if contents is None:
-        revenue_df, expenses_df, budget, bs = get_default_data()
-        status = "Using built-in sample data (no file uploaded)."
-    else:
-        try:
-            revenue_df, expenses_df, budget, bs = parse_contents(contents, filename)
-            status = f"File '{filename}' uploaded and parsed successfully."
-        except Exception as e:
-            revenue_df, expenses_df, budget, bs = get_default_data()
-            status = (
-                f"Failed to parse uploaded file '{filename}': {e}. "
-                "Falling back to built-in sample data."
-            )
+def update_dashboard(data):
+    if data is None:
+        # 没上传文件：直接返回启动时已经生成好的默认图表，不再重复构建
+        return (
+            default_rev_fig_json,
+            default_pm_fig_json,
+            default_cum_fig_json,
+            default_exp_fig_json,
+            default_perf_section,
+            default_is_table,
+            default_pl_table,
+            default_bs_section,
+        )
+
+    # Store 的内容来自浏览器，缓存键必须在服务端按实际渲染的数据重新计算
+    key = hashlib.blake2b(
+        json.dumps(data, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return _build_all(key, data)
+
+
+@memoize(args_to_ignore=["data"])
+def _build_all(key, data):
+    revenue_df = pd.DataFrame(**data["revenue"])
+    expenses_df = pd.DataFrame(**data["expenses"])
+    budget = data["budget"]
+    bs = data["bs"]
 
     fig_rev = build_business_unit_revenue_figure(revenue_df)
     fig_pm = build_profit_margin_figure(revenue_df)
@@ -785,7 +959,6 @@ def update_dashboard(contents, filename):
         is_table,
         pl_table,
         bs_section,
-        status,
     )
 
 
@@ -794,4 +967,6 @@ def update_dashboard(contents, filename):
 # -----------------------------------------------------------
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # 默认关闭 debug / 热重载；开发时用 DASH_DEBUG=1 python dashboard1.py
+    debug = os.getenv("DASH_DEBUG") == "1"
+    app.run(debug=debug, dev_tools_hot_reload=debug, dev_tools_ui=debug)